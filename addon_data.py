@@ -1,13 +1,16 @@
-import os
 from pathlib import Path
 
 
 class AddonData:
     def __init__(self, name: str, config: dict):
         self.name = name
+        self.name_lc = name.casefold()
         self.link = config["link"]
         self.description = config["description"]
-        self.target_path = config["target_path"].replace("/", os.sep)
+        self.target_path = Path(config["target_path"])
+        self.install_path = self.target_path / name
+        self.vers_path = self.target_path / "NSQC" / "vers"
+        self.vers_path_str = str(self.vers_path)
         self.installed = False
         self.updating = False
         self.needs_update = False
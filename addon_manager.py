@@ -1,90 +1,184 @@
-import json
+import os
 import logging
-import traceback
+import threading
+import time
 import platform
 import subprocess
-from collections import OrderedDict
-from typing import Dict, Optional
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, FrozenSet, Optional, Tuple
 from pathlib import Path
-from urllib.request import Request, urlopen
-from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtCore import QObject, QRunnable, QSignalBlocker, QThreadPool, pyqtSignal
 
 from addon_data import AddonData
-from install_thread import InstallThread
-from utils import ErrorHandler
+from install_thread import InstallThread, InstallSignals
+from utils import (
+    ErrorHandler,
+    fetch_remote_text,
+    read_local_nsqc_version,
+    loads_json,
+    path_exists_cached,
+    ADDONS_CONFIG_URL,
+    NSQC_VERSION_URL,
+)
+
+_SYSTEM = platform.system()
+
+# Интервал периодической проверки обновлений NSQC, секунды
+NSQC_CHECK_INTERVAL = 30.0
+NSQC_CHECK_INTERVAL_MAX = 600.0
+
+
+class _ManifestLoader(QRunnable):
+    def __init__(self, manager: "AddonManager"):
+        super().__init__()
+        self.manager = manager
+
+    def run(self):
+        self.manager._manifest_fetched.emit(self.manager._fetch_manifest())
+
+
+class _UpdateChecker(QRunnable):
+    def __init__(self, manager: "AddonManager"):
+        super().__init__()
+        self.manager = manager
+
+    def run(self):
+        self.manager._nsqc_checked.emit(self.manager._check_nsqc_remote())
 
 
 class AddonManager(QObject):
     update_progress = pyqtSignal(str, float)
     operation_finished = pyqtSignal(str, bool)
     addon_update_available = pyqtSignal(str)
+    addons_loaded = pyqtSignal()
+    _manifest_fetched = pyqtSignal(object)
+    _nsqc_checked = pyqtSignal(bool)
 
     def __init__(self):
         super().__init__()
-        self.addons: Dict[str, AddonData] = OrderedDict()
-        self.current_thread = None
+        self.addons: Dict[str, AddonData] = {}
+        self._tasks: Dict[str, InstallSignals] = {}
+        self._scan_cache: Dict[Path, FrozenSet[str]] = {}
+        # Карточки аддонов по имени, заполняется главным окном
+        self.addon_widgets: Dict[str, object] = {}
         self.error_handler = ErrorHandler()
-        self._checking_update = False
+        self._check_lock = threading.Lock()
+        self._last_check_ts = 0.0
+        self._check_interval = NSQC_CHECK_INTERVAL
+        # Сигнал из потока пула доставляется в GUI-поток очередью
+        self._manifest_fetched.connect(self._apply_manifest)
+        self._nsqc_checked.connect(self._on_nsqc_checked)
         self.load_addons()
 
     def load_addons(self):
+        """Загружает список аддонов в фоне, по готовности испускает addons_loaded"""
+        QThreadPool.globalInstance().start(_ManifestLoader(self))
+
+    def _fetch_manifest(self) -> Optional[Tuple[dict, bool]]:
+        # Выполняется в пуле потоков: только сеть и файлы, без изменения состояния
         try:
-            url = "https://raw.githubusercontent.com/Vladgobelen/NSQCu/main/addons.json"
-            req = Request(url, headers={"User-Agent": "NightWatchUpdater"})
+            # Версия NSQC запрашивается параллельно со списком аддонов и
+            # сравнивается здесь же, GUI-поток получает готовый результат
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                version_future = pool.submit(self._get_remote_nsqc_version)
+                data = loads_json(fetch_remote_text(ADDONS_CONFIG_URL))
+                remote_ver = version_future.result()
+
+            local_ver = self._get_local_nsqc_version()
+            nsqc_update = (
+                local_ver is not None and remote_ver is not None and remote_ver != local_ver
+            )
+            return data, nsqc_update
+
+        except Exception as e:
+            logging.error("Ошибка загрузки аддонов: %s", e, exc_info=True)
+            return None
 
-            with urlopen(req) as response:
-                data = json.loads(response.read().decode("utf-8"))
+    def _apply_manifest(self, manifest: Optional[Tuple[dict, bool]]):
+        try:
+            if manifest is not None:
+                data, nsqc_update = manifest
                 for name, config in data["addons"].items():
                     self.addons[name] = AddonData(name, config)
 
                 self.check_installed()
 
+                addon = self.addons.get("NSQC")
+                if addon is not None and addon.installed:
+                    addon.needs_update = nsqc_update
+                    if nsqc_update and not addon.being_processed:
+                        self.addon_update_available.emit("NSQC")
+
         except Exception as e:
-            logging.error(
-                f"Ошибка загрузки аддонов: {str(e)}\n{traceback.format_exc()}"
-            )
+            logging.error("Ошибка загрузки аддонов: %s", e, exc_info=True)
+
+        self.addons_loaded.emit()
+
+    def _scan_target(self, path: Path) -> FrozenSet[str]:
+        """Один проход scandir по каталогу, имена приведены через casefold"""
+        names = self._scan_cache.get(path)
+        if names is None:
+            try:
+                with os.scandir(path) as it:
+                    names = frozenset(entry.name.casefold() for entry in it)
+            except OSError:
+                names = frozenset()
+            self._scan_cache[path] = names
+        return names
+
+    def _is_addon_present(self, addon: AddonData) -> bool:
+        name_lc = addon.name_lc
+        names = self._scan_target(addon.target_path)
+        return name_lc in names or any(name_lc in entry_name for entry_name in names)
 
     def check_installed(self):
+        self._scan_cache.clear()
         for addon in self.addons.values():
             try:
                 if addon.name == "NSQC":
-                    vers_path = Path(addon.target_path) / "NSQC" / "vers"
-                    addon.installed = vers_path.exists()
-
-                    if addon.installed:
-                        self.check_nsqc_update()
+                    addon.installed = os.path.lexists(addon.vers_path_str)
                 else:
-                    target_path = Path(addon.target_path) / addon.name
-                    addon.installed = target_path.exists()
-
-                    if not addon.installed:
-                        for item in Path(addon.target_path).glob(f"*{addon.name}*"):
-                            if addon.name.lower() in item.name.lower():
-                                addon.installed = True
-                                break
+                    addon.installed = self._is_addon_present(addon)
 
             except Exception as e:
                 logging.error(f"Ошибка проверки аддона {addon.name}: {str(e)}")
                 addon.installed = False
 
     def check_nsqc_update(self) -> bool:
-        if "NSQC" not in self.addons:
-            return False
+        result = self._check_nsqc_remote()
+        if result and not self.addons["NSQC"].being_processed:
+            self.addon_update_available.emit("NSQC")
+        return result
 
-        addon = self.addons["NSQC"]
-        if not addon.installed:
+    def _check_nsqc_remote(self) -> bool:
+        addon = self.addons.get("NSQC")
+        if addon is None or not addon.installed:
             return False
+        return self._safe_check_nsqc_update(addon)
 
-        result = self._safe_check_nsqc_update(addon)
-        if result and not addon.being_processed:
-            self.addon_update_available.emit("NSQC")
-        return result
+    def poll_nsqc_update(self):
+        """Периодическая проверка в пуле потоков: пока версия не меняется, интервал растет до 10 минут"""
+        now = time.monotonic()
+        # Секунда запаса на неточность срабатывания таймера
+        if now - self._last_check_ts + 1.0 < self._check_interval:
+            return
+
+        self._last_check_ts = now
+        QThreadPool.globalInstance().start(_UpdateChecker(self))
+
+    def _on_nsqc_checked(self, result: bool):
+        if result:
+            self._check_interval = NSQC_CHECK_INTERVAL
+            if not self.addons["NSQC"].being_processed:
+                self.addon_update_available.emit("NSQC")
+        else:
+            self._check_interval = min(self._check_interval * 1.5, NSQC_CHECK_INTERVAL_MAX)
 
     def _safe_check_nsqc_update(self, addon: AddonData) -> bool:
-        if self._checking_update:
+        if not self._check_lock.acquire(blocking=False):
             return False
 
-        self._checking_update = True
         result = False
 
         try:
@@ -100,30 +194,16 @@ class AddonManager(QObject):
         except Exception as e:
             logging.error(f"Ошибка проверки обновлений: {str(e)}")
         finally:
-            self._checking_update = False
+            self._check_lock.release()
 
         return result
 
     def _get_local_nsqc_version(self) -> Optional[str]:
-        vers_path = Path("Interface/AddOns/NSQC/vers")
-        if not vers_path.exists():
-            return None
-
-        try:
-            with open(vers_path, "r") as f:
-                return f.read().strip()
-        except Exception as e:
-            logging.error(f"Ошибка чтения локальной версии NSQC: {e}")
-            return None
+        return read_local_nsqc_version()
 
     def _get_remote_nsqc_version(self) -> Optional[str]:
         try:
-            req = Request(
-                "https://raw.githubusercontent.com/Vladgobelen/NSQC/main/vers",
-                headers={"User-Agent": "NightWatchUpdater"},
-            )
-            with urlopen(req) as response:
-                return response.read().decode("utf-8").strip()
+            return fetch_remote_text(NSQC_VERSION_URL).strip()
         except Exception as e:
             logging.error(f"Ошибка получения удаленной версии NSQC: {e}")
             return None
@@ -138,21 +218,36 @@ class AddonManager(QObject):
         if addon.being_processed:
             return
 
+        # Уже установленный аддон не требует ни потока, ни загрузки.
+        # Каталог сканируется заново: папку могли удалить вне программы
+        if install and name != "NSQC":
+            self._scan_cache.pop(addon.target_path, None)
+            if self._is_addon_present(addon):
+                addon.installed = True
+                self.operation_finished.emit(name, True)
+                return
+
         addon.being_processed = True
         addon.updating = True
 
         thread = InstallThread(addon, install)
-        self.current_thread = thread
+        # Задачи разных аддонов идут параллельно в общем пуле. Сигналы
+        # последней задачи аддона держим, иначе слоты уйдут вместе с ними
+        self._tasks[name] = thread.signals
 
-        thread.progress.connect(lambda p: self.update_progress.emit(name, p))
-        thread.finished.connect(
-            lambda success: self._on_operation_finished(name, success, install)
-        )
+        thread.progress.connect(partial(self._emit_progress, name))
+        thread.finished.connect(partial(self._on_thread_finished, name, install))
         thread.error.connect(self._on_operation_error)
         thread.critical_error.connect(self._on_critical_error)
 
         thread.start()
 
+    def _emit_progress(self, name: str, progress: float):
+        self.update_progress.emit(name, progress)
+
+    def _on_thread_finished(self, name: str, install: bool, success: bool):
+        self._on_operation_finished(name, success, install)
+
     def _on_operation_finished(self, name: str, success: bool, install: bool):
         if name not in self.addons:
             return
@@ -164,18 +259,11 @@ class AddonManager(QObject):
         try:
             if success:
                 if name == "NSQC":
-                    vers_path = Path(addon.target_path) / "NSQC" / "vers"
-                    addon.installed = vers_path.exists()
+                    addon.installed = os.path.lexists(addon.vers_path_str)
                     self.check_nsqc_update()
                 else:
-                    target_path = Path(addon.target_path) / name
-                    addon.installed = target_path.exists()
-
-                    if not addon.installed:
-                        for item in Path(addon.target_path).glob(f"*{name}*"):
-                            if name.lower() in item.name.lower():
-                                addon.installed = True
-                                break
+                    self._scan_cache.pop(addon.target_path, None)
+                    addon.installed = self._is_addon_present(addon)
 
             self._update_ui(name)
 
@@ -187,31 +275,26 @@ class AddonManager(QObject):
         self.operation_finished.emit(name, success)
 
     def _update_ui(self, name: str):
-        if not hasattr(self, "addons_layout"):
+        w = self.addon_widgets.get(name)
+        if w is None:
             return
 
-        for i in range(self.addons_layout.count()):
-            w = self.addons_layout.itemAt(i).widget()
-            if w and hasattr(w, "name") and w.name == name:
-                try:
-                    addon = self.addons[name]
-                    w.progress.setVisible(False)
+        try:
+            addon = self.addons[name]
+            w.progress.setVisible(False)
 
-                    w.checkbox.blockSignals(True)
+            if w.checkbox.isChecked() != addon.installed:
+                with QSignalBlocker(w.checkbox):
                     w.checkbox.setChecked(addon.installed)
-                    w.checkbox.blockSignals(False)
-
-                    if name == "NSQC":
-                        w.update_label.setVisible(addon.needs_update)
-                        w.update_label.setText(
-                            "(Доступно обновление)" if addon.needs_update else ""
-                        )
 
-                    w.checkbox.update()
-                    w.checkbox.repaint()
-                except Exception as e:
-                    pass
-                break
+            if name == "NSQC":
+                text = "(Доступно обновление)" if addon.needs_update else ""
+                if w.update_label.isHidden() == addon.needs_update:
+                    w.update_label.setVisible(addon.needs_update)
+                if w.update_label.text() != text:
+                    w.update_label.setText(text)
+        except Exception as e:
+            pass
 
     def _on_operation_error(self, error_msg: str):
         logging.error(f"Ошибка операции: {error_msg}")
@@ -223,18 +306,22 @@ class AddonManager(QObject):
 
     def launch_game(self) -> bool:
         wow_path = Path("Wow.exe")
-        if not wow_path.exists():
+        if not path_exists_cached(wow_path):
             logging.error("Файл Wow.exe не найден")
             return False
 
         try:
-            if platform.system() == "Windows":
+            if _SYSTEM == "Windows":
+                os.startfile(str(wow_path))
+            else:
                 subprocess.Popen(
-                    [str(wow_path)], creationflags=subprocess.CREATE_NO_WINDOW
+                    [str(wow_path)],
+                    start_new_session=True,
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
                 )
-            else:
-                subprocess.Popen([str(wow_path)])
             return True
         except Exception as e:
-            logging.error(f"Ошибка запуска игры: {str(e)}\n{traceback.format_exc()}")
+            logging.error("Ошибка запуска игры: %s", e, exc_info=True)
             return False
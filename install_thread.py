@@ -1,27 +1,106 @@
+import io
 import os
 import zipfile
 import shutil
 import tempfile
-import traceback
 import logging
-import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from urllib.request import Request, urlopen
-from PyQt5.QtCore import QThread, pyqtSignal
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
 
 from addon_data import AddonData
+from utils import fetch_remote_text, http_get, read_local_nsqc_version, NSQC_VERSION_URL
 
+NSQC_ARCHIVE_URL = "https://github.com/Vladgobelen/NSQC/archive/refs/heads/main.zip"
+# Архивы меньше этого размера скачиваются в память, большие сбрасываются на диск
+SPOOL_MAX_SIZE = 8 << 20
 
-class InstallThread(QThread):
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+# Меньшие архивы распаковываются последовательно, без пула потоков
+PARALLEL_EXTRACT_MIN_MEMBERS = 8
+
+# Ограничение одновременных загрузок с GitHub
+MAX_PARALLEL_DOWNLOADS = 4
+_install_pool = None
+
+# Фоновое удаление старых файлов; один поток, чтобы удаления не пересекались
+_cleanup_pool = ThreadPoolExecutor(max_workers=1)
+
+
+def get_install_pool() -> QThreadPool:
+    """Общий пул потоков для установки и удаления аддонов"""
+    global _install_pool
+    if _install_pool is None:
+        _install_pool = QThreadPool()
+        _install_pool.setMaxThreadCount(MAX_PARALLEL_DOWNLOADS)
+    return _install_pool
+
+
+def _dir_contains(directory: Path, needle: str) -> bool:
+    """Есть ли в каталоге элемент, имя которого содержит needle (без учета регистра)"""
+    try:
+        with os.scandir(directory) as it:
+            return any(needle in entry.name.casefold() for entry in it)
+    except OSError:
+        return False
+
+
+def _remove_trees(*paths: Path):
+    for path in paths:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def _open_spool(total_size: int):
+    """Буфер для архива: в памяти, если размер известен и невелик, иначе временный файл"""
+    if 0 < total_size <= SPOOL_MAX_SIZE:
+        return io.BytesIO()
+    return tempfile.TemporaryFile()
+
+
+def _download_to(response, dst, total_size: int, callback):
+    """Копирует ответ сервера в dst через один переиспользуемый буфер"""
+    buf = bytearray(DOWNLOAD_CHUNK_SIZE)
+    view = memoryview(buf)
+    downloaded = 0
+    while True:
+        n = response.readinto(buf)
+        if not n:
+            break
+        dst.write(view[:n])
+        downloaded += n
+        if total_size > 0:
+            callback(downloaded / total_size)
+
+
+class InstallSignals(QObject):
     progress = pyqtSignal(float)
     finished = pyqtSignal(bool)
     error = pyqtSignal(str)
     critical_error = pyqtSignal(str)
 
+
+class InstallThread(QRunnable):
     def __init__(self, addon: AddonData, install: bool):
         super().__init__()
+        # QRunnable не QObject, сигналы живут в отдельном объекте
+        self.signals = InstallSignals()
+        self.progress = self.signals.progress
+        self.finished = self.signals.finished
+        self.error = self.signals.error
+        self.critical_error = self.signals.critical_error
         self.addon = addon
         self.install = install
+        self._last_pct = -1
+
+    def start(self):
+        get_install_pool().start(self)
+
+    def _emit_progress(self, value: float):
+        """Отправляет прогресс только при смене целого процента (не более ~100 раз)"""
+        pct = int(value * 100)
+        if pct != self._last_pct:
+            self._last_pct = pct
+            self.progress.emit(value)
 
     def run(self):
         try:
@@ -36,8 +115,7 @@ class InstallThread(QThread):
             self.finished.emit(success)
         except Exception as e:
             error_msg = f"{type(e).__name__}: {str(e)}"
-            tb = traceback.format_exc()
-            logging.error(f"Критическая ошибка в потоке:\n{error_msg}\n{tb}")
+            logging.exception(f"Критическая ошибка в потоке:\n{error_msg}")
             self.critical_error.emit(f"{error_msg}\n\nПодробности в лог-файле")
             self.finished.emit(False)
 
@@ -52,49 +130,59 @@ class InstallThread(QThread):
                 self.progress.emit(1.0)
                 return True
 
-            temp_dir = Path("temp")
-            zip_path = Path("main.zip")
-
-            if temp_dir.exists():
-                shutil.rmtree(temp_dir, ignore_errors=True)
-            if zip_path.exists():
-                try:
-                    zip_path.unlink()
-                except Exception as e:
-                    logging.error(f"Не удалось удалить старый zip-файл: {e}")
+            target_dir = Path("Interface/AddOns/NSQC")
+            staging_dir = target_dir.with_name(".NSQC-new")
+            old_dir = target_dir.with_name(".NSQC-old")
 
-            def update_progress(count, block_size, total_size):
-                progress = 0.1 + 0.8 * (count * block_size / total_size)
-                self.progress.emit(min(progress, 0.9))
+            # Остатки прошлых установок удаляются параллельно со скачиванием
+            cleanup = _cleanup_pool.submit(_remove_trees, staging_dir, old_dir)
 
+            spool = None
             try:
-                urllib.request.urlretrieve(
-                    "https://github.com/Vladgobelen/NSQC/archive/refs/heads/main.zip",
-                    "main.zip",
-                    reporthook=update_progress,
-                )
+                with http_get(NSQC_ARCHIVE_URL) as response:
+                    total_size = int(response.headers.get("Content-Length", 0))
+                    spool = _open_spool(total_size)
+                    _download_to(
+                        response,
+                        spool,
+                        total_size,
+                        lambda p: self._emit_progress(min(0.1 + 0.8 * p, 0.9)),
+                    )
             except Exception as e:
+                if spool is not None:
+                    spool.close()
                 logging.error(f"Ошибка при скачивании NSQC: {e}")
                 return False
 
-            self.progress.emit(0.5)
-
-            try:
-                with zipfile.ZipFile("main.zip", "r") as zip_file:
-                    zip_file.extractall("temp")
-            except Exception as e:
-                logging.error(f"Ошибка распаковки NSQC: {e}")
-                return False
+            with spool:
+                self.progress.emit(0.5)
+                spool.seek(0)
 
-            target_dir = Path("Interface/AddOns/NSQC")
-            try:
-                if target_dir.exists():
-                    shutil.rmtree(target_dir, ignore_errors=True)
-
-                shutil.copytree("temp/NSQC-main", target_dir)
-            except Exception as e:
-                logging.error(f"Ошибка копирования файлов NSQC: {e}")
-                return False
+                # Распаковка идет рядом с целевой папкой, затем переименования:
+                # при сбое старая версия остается нетронутой, а ее удаление
+                # выполняется в фоне уже после замены
+                try:
+                    cleanup.result()
+                    with zipfile.ZipFile(spool, "r") as zip_file:
+                        self._extract_members(
+                            zip_file, staging_dir, prefix="NSQC-main/", start=0.5, end=0.9
+                        )
+                    if not staging_dir.is_dir():
+                        raise FileNotFoundError(f"В архиве нет файлов NSQC: {staging_dir}")
+                    moved_old = target_dir.exists()
+                    if moved_old:
+                        os.replace(target_dir, old_dir)
+                    try:
+                        os.replace(staging_dir, target_dir)
+                    except OSError:
+                        # Возвращаем установленную версию на место
+                        if moved_old:
+                            os.replace(old_dir, target_dir)
+                        raise
+                    _cleanup_pool.submit(_remove_trees, old_dir)
+                except Exception as e:
+                    logging.error(f"Ошибка распаковки NSQC: {e}")
+                    return False
 
             vers_path = target_dir / "vers"
             try:
@@ -103,50 +191,73 @@ class InstallThread(QThread):
             except Exception as e:
                 logging.error(f"Не удалось создать файл версии: {e}")
 
-            try:
-                if zip_path.exists():
-                    zip_path.unlink()
-                if temp_dir.exists():
-                    shutil.rmtree(temp_dir, ignore_errors=True)
-            except Exception as e:
-                logging.error(f"Ошибка очистки временных файлов: {e}")
-
             self.progress.emit(1.0)
             return True
 
         except Exception as e:
             logging.error(f"Критическая ошибка установки NSQC: {e}")
-            for path in [Path("main.zip"), Path("temp")]:
-                try:
-                    if path.exists():
-                        if path.is_dir():
-                            shutil.rmtree(path, ignore_errors=True)
-                        else:
-                            path.unlink()
-                except Exception as cleanup_err:
-                    logging.error(f"Ошибка очистки {path}: {cleanup_err}")
             return False
 
-    def _get_local_nsqc_version(self) -> str:
-        vers_path = Path("Interface/AddOns/NSQC/vers")
-        if not vers_path.exists():
-            return None
-
+    def _extract_members(
+        self,
+        zip_file: zipfile.ZipFile,
+        target_dir: Path,
+        prefix: str = "",
+        start: float = 0.8,
+        end: float = 0.95,
+    ):
+        """Распаковывает архив в target_dir, отбрасывая prefix у путей"""
+        jobs = []
+        # Каждый каталог создается один раз, а не перед каждым файлом
+        created_dirs = set()
+
+        for info in zip_file.infolist():
+            if not info.filename.startswith(prefix):
+                continue
+            rel_path = Path(info.filename[len(prefix):])
+            if not rel_path.parts or rel_path.is_absolute() or ".." in rel_path.parts:
+                continue
+
+            dest = target_dir / rel_path
+            dest_dir = dest if info.is_dir() else dest.parent
+            if dest_dir not in created_dirs:
+                dest_dir.mkdir(parents=True, exist_ok=True)
+                created_dirs.add(dest_dir)
+            if not info.is_dir():
+                jobs.append((info, dest))
+
+        def extract(job) -> int:
+            info, dest = job
+            if info.file_size == 0:
+                # Пустой файл: нечего распаковывать и проверять
+                open(dest, "wb").close()
+                return 0
+            with zip_file.open(info) as src, open(dest, "wb") as dst:
+                shutil.copyfileobj(src, dst, 1 << 20)
+            return info.file_size
+
+        total_size = sum(info.file_size for info, _ in jobs) or 1
+        extracted = 0
+
+        # Файлы архива независимы: при большом их числе распаковываем в пуле.
+        # ZipFile в режиме чтения разделяет дескриптор между открытыми файлами
+        pool = None
+        if len(jobs) >= PARALLEL_EXTRACT_MIN_MEMBERS:
+            pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 1)
         try:
-            with open(vers_path, "r") as f:
-                return f.read().strip()
-        except Exception as e:
-            logging.error(f"Ошибка чтения локальной версии NSQC: {e}")
-            return None
+            for size in (pool.map(extract, jobs) if pool else map(extract, jobs)):
+                extracted += size
+                self._emit_progress(start + (end - start) * (extracted / total_size))
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+    def _get_local_nsqc_version(self) -> str:
+        return read_local_nsqc_version()
 
     def _get_remote_nsqc_version(self) -> str:
         try:
-            req = Request(
-                "https://raw.githubusercontent.com/Vladgobelen/NSQC/main/vers",
-                headers={"User-Agent": "NightWatchUpdater"},
-            )
-            with urlopen(req) as response:
-                return response.read().decode("utf-8").strip()
+            return fetch_remote_text(NSQC_VERSION_URL).strip()
         except Exception as e:
             logging.error(f"Ошибка получения удаленной версии NSQC: {e}")
             return None
@@ -155,12 +266,9 @@ class InstallThread(QThread):
         try:
             self.progress.emit(0.1)
 
-            target_dir = Path(self.addon.target_path)
+            target_dir = self.addon.target_path
 
-            if any(
-                self.addon.name.lower() in item.name.lower()
-                for item in target_dir.glob("*")
-            ):
+            if _dir_contains(target_dir, self.addon.name_lc):
                 self.progress.emit(1.0)
                 return True
 
@@ -178,53 +286,46 @@ class InstallThread(QThread):
                 return self._install_file()
 
         except Exception as e:
-            logging.error(f"Ошибка установки: {str(e)}\n{traceback.format_exc()}")
+            logging.exception(f"Ошибка установки: {str(e)}")
             return False
 
     def _install_zip(self) -> bool:
-        temp_dir = Path(tempfile.mkdtemp())
-        zip_path = temp_dir / f"{self.addon.name}.zip"
-
         try:
-            req = Request(self.addon.link, headers={"User-Agent": "NightWatchUpdater"})
-            with urlopen(req) as response:
+            with http_get(self.addon.link) as response:
                 total_size = int(response.headers.get("Content-Length", 0))
                 if total_size == 0:
                     error_msg = "Не удалось определить размер файла"
                     self.error.emit(error_msg)
                     return False
 
-                downloaded = 0
-                chunk_size = 8192
-
-                with open(zip_path, "wb") as f:
-                    while True:
-                        chunk = response.read(chunk_size)
-                        if not chunk:
-                            break
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        progress = 0.1 + 0.7 * (downloaded / total_size)
-                        self.progress.emit(progress)
-
-            self.progress.emit(0.8)
-            try:
-                with zipfile.ZipFile(zip_path, "r") as zip_ref:
-                    zip_ref.extractall(self.addon.target_path)
-            except zipfile.BadZipFile:
-                target_path = Path(self.addon.target_path) / self.addon.name
-                shutil.copy2(zip_path, target_path)
-            except Exception as e:
-                error_msg = f"Ошибка распаковки: {str(e)}"
-                self.error.emit(error_msg)
-                logging.error(error_msg)
-                return False
+                spool = _open_spool(total_size)
+                try:
+                    _download_to(
+                        response, spool, total_size, lambda p: self._emit_progress(0.1 + 0.7 * p)
+                    )
+                except Exception:
+                    spool.close()
+                    raise
+
+            with spool:
+                self.progress.emit(0.8)
+                spool.seek(0)
+                target_dir = self.addon.target_path
+                try:
+                    with zipfile.ZipFile(spool, "r") as zip_ref:
+                        self._extract_members(zip_ref, target_dir)
+                except zipfile.BadZipFile:
+                    spool.seek(0)
+                    with open(target_dir / self.addon.name, "wb") as f:
+                        shutil.copyfileobj(spool, f, DOWNLOAD_CHUNK_SIZE)
+                except Exception as e:
+                    error_msg = f"Ошибка распаковки: {str(e)}"
+                    self.error.emit(error_msg)
+                    logging.error(error_msg)
+                    return False
 
             self.progress.emit(0.95)
-            installed = any(
-                self.addon.name.lower() in item.name.lower()
-                for item in Path(self.addon.target_path).glob("*")
-            )
+            installed = _dir_contains(self.addon.target_path, self.addon.name_lc)
 
             if not installed:
                 error_msg = f"Аддон {self.addon.name} не обнаружен после установки"
@@ -232,56 +333,46 @@ class InstallThread(QThread):
                 logging.error(error_msg)
                 return False
 
-            try:
-                shutil.rmtree(temp_dir)
-            except Exception as e:
-                logging.error(f"Не удалось удалить временные файлы: {str(e)}")
-
             self.progress.emit(1.0)
             return True
 
         except Exception as e:
-            logging.error(f"Ошибка установки: {str(e)}\n{traceback.format_exc()}")
-            if "temp_dir" in locals() and temp_dir.exists():
-                try:
-                    shutil.rmtree(temp_dir)
-                except Exception as cleanup_err:
-                    logging.error(f"Ошибка очистки временных файлов: {cleanup_err}")
+            logging.exception(f"Ошибка установки: {str(e)}")
             return False
 
     def _install_file(self) -> bool:
         try:
-            target_path = Path(self.addon.target_path) / self.addon.name
-            temp_path = Path(tempfile.mktemp())
+            target_path = self.addon.install_path
 
-            req = Request(self.addon.link, headers={"User-Agent": "NightWatchUpdater"})
-            with urlopen(req) as response, open(temp_path, "wb") as f:
+            with http_get(self.addon.link) as response:
                 total_size = int(response.headers.get("Content-Length", 0))
                 if total_size == 0:
                     error_msg = "Не удалось определить размер файла"
                     self.error.emit(error_msg)
                     return False
 
-                downloaded = 0
-                chunk_size = 8192
-
-                while True:
-                    chunk = response.read(chunk_size)
-                    if not chunk:
-                        break
-                    f.write(chunk)
-                    downloaded += len(chunk)
-                    progress = 0.1 + 0.9 * (downloaded / total_size)
-                    self.progress.emit(progress)
+                # Временный файл в том же каталоге: os.replace станет переименованием.
+                # Права 0o666 с учетом umask, как у обычного open()
+                temp_path = target_path.with_name(
+                    f".{target_path.name}.{os.urandom(4).hex()}.part"
+                )
+                fd = os.open(
+                    temp_path,
+                    os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0),
+                    0o666,
+                )
+                with os.fdopen(fd, "wb") as f:
+                    _download_to(
+                        response, f, total_size, lambda p: self._emit_progress(0.1 + 0.9 * p)
+                    )
 
-            shutil.copy2(temp_path, target_path)
-            os.unlink(temp_path)
+            os.replace(temp_path, target_path)
 
             self.progress.emit(1.0)
             return True
 
         except Exception as e:
-            logging.error(f"Ошибка установки файла: {str(e)}\n{traceback.format_exc()}")
+            logging.exception(f"Ошибка установки файла: {str(e)}")
             if "temp_path" in locals() and temp_path.exists():
                 try:
                     os.unlink(temp_path)
@@ -291,15 +382,16 @@ class InstallThread(QThread):
 
     def _uninstall(self) -> bool:
         try:
-            target_dir = Path(self.addon.target_path)
+            target_dir = self.addon.target_path
 
             if not target_dir.exists():
                 return True
 
-            items_to_remove = []
-            for item in target_dir.glob(f"*{self.addon.name}*"):
-                if self.addon.name.lower() in item.name.lower():
-                    items_to_remove.append(item)
+            name_lc = self.addon.name_lc
+            with os.scandir(target_dir) as it:
+                items_to_remove = [
+                    Path(entry.path) for entry in it if name_lc in entry.name.casefold()
+                ]
 
             if not items_to_remove:
                 return True
@@ -317,7 +409,5 @@ class InstallThread(QThread):
 
             return success
         except Exception as e:
-            logging.error(
-                f"Ошибка в процессе удаления: {str(e)}\n{traceback.format_exc()}"
-            )
+            logging.exception(f"Ошибка в процессе удаления: {str(e)}")
             return False
@@ -1,11 +1,15 @@
 import sys
+from PyQt5.QtCore import QCoreApplication, Qt
 from PyQt5.QtWidgets import QApplication
-from main_window import AddonUpdater
+from main_window import AddonUpdater, APP_STYLESHEET
 
 
 def main():
+    # Шрифт и цвета из таблицы стилей наследуются дочерними виджетами
+    QCoreApplication.setAttribute(Qt.AA_UseStyleSheetPropagationInWidgetStyles)
     app = QApplication(sys.argv)
     app.setStyle("Fusion")
+    app.setStyleSheet(APP_STYLESHEET)
 
     window = AddonUpdater()
     window.show()
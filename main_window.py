@@ -2,20 +2,203 @@ import sys
 import os
 import traceback
 import logging
-from pathlib import Path
+import queue
+from functools import lru_cache
+from logging.handlers import QueueHandler, QueueListener
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget,
-    QPushButton, QLabel, QCheckBox, QScrollArea, QFrame, QProgressBar,
+    QPushButton, QLabel, QCheckBox, QScrollArea, QFrame,
     QSizePolicy, QMessageBox, QStackedWidget, QListWidget, QListWidgetItem,
     QLineEdit, QTextEdit
 )
-from PyQt5.QtCore import Qt, QTimer, QSize
-from PyQt5.QtGui import QIcon, QPalette, QColor, QFont, QFontDatabase
+from PyQt5.QtCore import Qt, QEvent, QTimer, QSize, QSignalBlocker
+from PyQt5.QtGui import QIcon, QPalette, QColor, QFont, QFontDatabase, QPainter
 
 from addon_manager import AddonManager
-from voice_client_ui import VoiceChatUI
 from addon_data import AddonData  # Добавлен импорт AddonData
-from utils import ErrorHandler  # Добавлен импорт ErrorHandler
+from utils import ErrorHandler, path_exists_cached
+
+
+# Общая таблица стилей, применяется к приложению один раз в main().
+# Отдельные виджеты выбираются по objectName, своих стилей у них нет
+APP_STYLESHEET = """
+    QWidget {
+        color: #FFFFFF;
+        background-color: #2D2D2D;
+    }
+    QCheckBox {
+        color: #FFFFFF;
+        spacing: 6px;
+        background-color: #2d2d2d;
+        padding: 5px;
+        border-radius: 5px;
+    }
+    QCheckBox::indicator {
+        width: 16px;
+        height: 16px;
+    }
+    QCheckBox::indicator:unchecked {
+        border: 1px solid #555555;
+        background-color: #333333;
+        border-radius: 3px;
+    }
+    QCheckBox::indicator:checked {
+        border: 1px solid #555555;
+        background-color: #2A82DA;
+        border-radius: 3px;
+    }
+    QCheckBox:hover {
+        background-color: #3d3d3d;
+    }
+    QProgressBar {
+        height: 4px;
+        border-radius: 2px;
+        background: #252525;
+    }
+    QProgressBar::chunk {
+        background: #2A82DA;
+        border-radius: 2px;
+    }
+    QLabel {
+        color: #FFFFFF;
+    }
+    QLabel[accessibleName="updateLabel"] {
+        color: #8BC34A;
+        font-style: italic;
+        background-color: transparent;
+        padding: 2px 5px;
+        border-radius: 3px;
+    }
+    QScrollBar:vertical {
+        extreme: none;
+        background: #2D2D2D;
+        width: 10px;
+        margin: 0px 0px 0px 0px;
+    }
+    QScrollBar::handle:vertical {
+        background: #555555;
+        min-height: 20px;
+        border-radius: 4px;
+    }
+    #topBar {
+        background-color: #2d2d2d;
+    }
+    QPushButton#voiceBtn {
+        background-color: #3498db;
+        border: none;
+        border-radius: 20px;
+        color: white;
+        font-size: 16px;
+    }
+    QPushButton#voiceBtn:hover {
+        background-color: #2980b9;
+    }
+    #gamePanel {
+        background-color: #2d2d2d;
+        border-radius: 10px;
+        margin: 10px;
+        padding: 10px;
+    }
+    QLabel#gameStatus[gameFound="true"] {
+        color: #4CAF50;
+    }
+    QLabel#gameStatus[gameFound="false"] {
+        color: #F44336;
+    }
+    QPushButton#launchBtn {
+        background-color: #2ecc71;
+        border: none;
+        border-radius: 5px;
+        color: white;
+        font-weight: bold;
+        padding: 5px;
+    }
+    QPushButton#launchBtn:hover {
+        background-color: #27ae60;
+    }
+    QPushButton#launchBtn:disabled {
+        background-color: #7f8c8d;
+    }
+    QFrame#addonsSeparator {
+        background-color: #555555;
+        margin: 0 10px;
+    }
+    QScrollArea#addonsScrollArea {
+        border: none;
+        background-color: transparent;
+    }
+    #addonCard {
+        background-color: #2d2d2d;
+        border-radius: 10px;
+        padding: 5px;
+    }
+    QCheckBox#addonCheckbox {
+        font-weight: bold;
+        font-size: 12px;
+    }
+    QLabel#addonDesc {
+        color: #AAAAAA;
+        font-size: 11px;
+    }
+"""
+
+_app_font_id = None
+_app_font_applied = False
+
+# Запись лога в файл идет в отдельном потоке, GUI-поток только кладет в очередь
+_log_queue = queue.SimpleQueue()
+_log_listener = None
+_LOG_FORMATTER = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+
+@lru_cache(maxsize=1)
+def _get_dark_palette() -> QPalette:
+    """Темная палитра приложения, собирается один раз"""
+    dark_palette = QPalette()
+    dark_palette.setColor(QPalette.Window, QColor(45, 45, 45))
+    dark_palette.setColor(QPalette.WindowText, Qt.white)
+    dark_palette.setColor(QPalette.Base, QColor(30, 30, 30))
+    dark_palette.setColor(QPalette.AlternateBase, QColor(45, 45, 45))
+    dark_palette.setColor(QPalette.ToolTipBase, Qt.white)
+    dark_palette.setColor(QPalette.ToolTipText, Qt.white)
+    dark_palette.setColor(QPalette.Text, Qt.white)
+    dark_palette.setColor(QPalette.Button, QColor(60, 60, 60))
+    dark_palette.setColor(QPalette.ButtonText, Qt.white)
+    dark_palette.setColor(QPalette.BrightText, Qt.red)
+    dark_palette.setColor(QPalette.Link, QColor(42, 130, 218))
+    dark_palette.setColor(QPalette.Highlight, QColor(42, 130, 218))
+    dark_palette.setColor(QPalette.HighlightedText, Qt.black)
+    dark_palette.setColor(QPalette.Disabled, QPalette.Text, Qt.darkGray)
+    dark_palette.setColor(QPalette.Disabled, QPalette.ButtonText, Qt.darkGray)
+    return dark_palette
+
+
+class AddonProgressBar(QWidget):
+    """Тонкая полоса прогресса карточки, рисуется двумя заливками без движка стилей"""
+
+    FILL_COLOR = QColor("#2A82DA")
+    TRACK_COLOR = QColor("#252525")
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._value = 0
+        self.setFixedHeight(3)
+        # Полоса целиком закрашивается в paintEvent, стирать фон не нужно
+        self.setAttribute(Qt.WA_OpaquePaintEvent, True)
+        self.setAttribute(Qt.WA_NoSystemBackground, True)
+
+    def setValue(self, value: int):
+        if value != self._value:
+            self._value = value
+            self.update()
+
+    def paintEvent(self, event):
+        width, height = self.width(), self.height()
+        filled = width * self._value // 100
+        painter = QPainter(self)
+        painter.fillRect(0, 0, filled, height, self.FILL_COLOR)
+        painter.fillRect(filled, 0, width - filled, height, self.TRACK_COLOR)
+        painter.end()
 
 
 def get_base_path():
@@ -34,16 +217,18 @@ class AddonUpdater(QMainWindow):
         self.logger.setLevel(logging.DEBUG)
 
         # Настройка логирования
-        if not hasattr(self, 'logger_configured'):
+        global _log_listener
+        if _log_listener is None:
             if not os.path.exists('logs'):
                 os.makedirs('logs')
 
-            fh = logging.FileHandler('logs/main_ui.log')
+            fh = logging.FileHandler('logs/main_ui.log', delay=True)
             fh.setLevel(logging.DEBUG)
-            formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-            fh.setFormatter(formatter)
-            self.logger.addHandler(fh)
-            self.logger_configured = True
+            fh.setFormatter(_LOG_FORMATTER)
+            _log_listener = QueueListener(_log_queue, fh, respect_handler_level=True)
+            _log_listener.start()
+        if not self.logger.handlers:
+            self.logger.addHandler(QueueHandler(_log_queue))
 
         self._setup_fonts()
         self._setup_ui()
@@ -51,20 +236,28 @@ class AddonUpdater(QMainWindow):
         self._setup_theme()
 
     def _setup_fonts(self):
-        font_db = QFontDatabase()
-        try:
-            # Попытка загрузить шрифт Arial
-            font_id = font_db.addApplicationFont(":/fonts/arial.ttf")
-            if font_id != -1:
-                font_family = font_db.applicationFontFamilies(font_id)[0]
-                self._font = QFont(font_family, 10)
-            else:
-                self._font = QFont("Arial", 10)
-        except:
-            self._font = QFont()
-            self._font.setPointSize(10)
-
-        QApplication.setFont(self._font)
+        global _app_font_id, _app_font_applied
+        # Попытка загрузить шрифт Arial (однократно на приложение),
+        # при неудаче addApplicationFont возвращает -1
+        if _app_font_id is None:
+            _app_font_id = QFontDatabase.addApplicationFont(":/fonts/arial.ttf")
+        families = (
+            QFontDatabase.applicationFontFamilies(_app_font_id)
+            if _app_font_id != -1
+            else []
+        )
+        self._font = QFont(families[0] if families else "Arial", 10)
+
+        # Смена шрифта приложения сбрасывает метрики всех виджетов, делаем ее один раз
+        if not _app_font_applied:
+            QApplication.setFont(self._font)
+            _app_font_applied = True
+
+        # Шрифты заголовков и кнопок создаются один раз на окно
+        self._bold12 = QFont("Arial", 12, QFont.Bold)
+        self._bold14 = QFont("Arial", 14, QFont.Bold)
+        self._regular12 = QFont("Arial", 12)
+        self._regular10 = QFont("Arial", 10)
 
     def _setup_ui(self):
         self.central_widget = QWidget()
@@ -78,10 +271,11 @@ class AddonUpdater(QMainWindow):
         main_layout.setSpacing(0)
 
         self.addon_widget = QWidget()
-        self.voice_widget = VoiceChatUI(self)
+        # Голосовой чат создается при первом переходе к нему
+        self.voice_widget = None
 
         self.stacked_widget.addWidget(self.addon_widget)
-        self.stacked_widget.addWidget(self.voice_widget)
+        self.stacked_widget.currentChanged.connect(self._on_page_changed)
 
         self._setup_addon_ui()
         self.logger.info("UI настройка завершена")
@@ -100,7 +294,7 @@ class AddonUpdater(QMainWindow):
         sep = QFrame()
         sep.setFrameShape(QFrame.HLine)
         sep.setFrameShadow(QFrame.Sunken)
-        sep.setStyleSheet("background-color: #555555; margin: 0 10px;")
+        sep.setObjectName("addonsSeparator")
         layout.addWidget(sep)
 
         # Заголовок аддонов
@@ -109,7 +303,7 @@ class AddonUpdater(QMainWindow):
         addons_header_layout.setContentsMargins(15, 10, 15, 5)
 
         addons_label = QLabel("Доступные аддоны")
-        addons_label.setFont(QFont("Arial", 12, QFont.Bold))
+        addons_label.setFont(self._bold12)
         addons_header_layout.addWidget(addons_label)
         addons_header_layout.addStretch()
 
@@ -121,33 +315,22 @@ class AddonUpdater(QMainWindow):
     def _setup_top_bar(self, parent_layout):
         top_bar = QWidget()
         top_bar.setFixedHeight(50)
-        top_bar.setStyleSheet("background-color: #2d2d2d;")
+        top_bar.setObjectName("topBar")
         top_layout = QHBoxLayout(top_bar)
         top_layout.setContentsMargins(10, 5, 10, 5)
 
         # Заголовок
         title = QLabel("Менеджер аддонов")
-        title.setFont(QFont("Arial", 14, QFont.Bold))
+        title.setFont(self._bold14)
         title.setAlignment(Qt.AlignCenter)
 
         # Кнопка голосового чата
         self.voice_btn = QPushButton("🎤")
-        self.voice_btn.setFont(QFont("Arial", 12))
+        self.voice_btn.setFont(self._regular12)
         self.voice_btn.setFixedSize(40, 40)
         self.voice_btn.setToolTip("Голосовой чат")
         self.voice_btn.clicked.connect(self.show_voice_chat)
-        self.voice_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #3498db;
-                border: none;
-                border-radius: 20px;
-                color: white;
-                font-size: 16px;
-            }
-            QPushButton:hover {
-                background-color: #2980b9;
-            }
-        """)
+        self.voice_btn.setObjectName("voiceBtn")
 
         top_layout.addStretch()
         top_layout.addWidget(title, 1)
@@ -159,40 +342,18 @@ class AddonUpdater(QMainWindow):
     def _setup_game_panel(self, parent_layout):
         panel = QWidget()
         panel.setObjectName("gamePanel")
-        panel.setStyleSheet("""
-            #gamePanel {
-                background-color: #2d2d2d;
-                border-radius: 10px;
-                margin: 10px;
-                padding: 10px;
-            }
-        """)
         panel_layout = QHBoxLayout(panel)
         panel_layout.setContentsMargins(10, 5, 10, 5)
         panel_layout.setSpacing(8)
 
         self.game_status = QLabel("Проверка игры...")
-        self.game_status.setFont(QFont("Arial", 10))
+        self.game_status.setObjectName("gameStatus")
+        self.game_status.setFont(self._regular10)
 
         self.launch_btn = QPushButton("Запустить игру")
         self.launch_btn.setFixedSize(120, 36)
         self.launch_btn.clicked.connect(self._launch_game)
-        self.launch_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #2ecc71;
-                border: none;
-                border-radius: 5px;
-                color: white;
-                font-weight: bold;
-                padding: 5px;
-            }
-            QPushButton:hover {
-                background-color: #27ae60;
-            }
-            QPushButton:disabled {
-                background-color: #7f8c8d;
-            }
-        """)
+        self.launch_btn.setObjectName("launchBtn")
 
         panel_layout.addWidget(self.game_status)
         panel_layout.addStretch()
@@ -206,28 +367,29 @@ class AddonUpdater(QMainWindow):
         scroll.setObjectName("addonsScrollArea")
         scroll.setWidgetResizable(True)
         scroll.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
-        scroll.setStyleSheet("""
-            QScrollArea {
-                border: none;
-                background-color: transparent;
-            }
-        """)
 
         content = QWidget()
         content.setObjectName("scrollContent")
         self.addons_layout = QVBoxLayout(content)
         self.addons_layout.setSpacing(10)
         self.addons_layout.setContentsMargins(10, 5, 10, 10)
+        self.addon_widgets = {}
+        # Последний прогресс по аддонам, выводится таймером не чаще ~30 раз в секунду
+        self._pending_progress = {}
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.timeout.connect(self._flush_progress)
 
         scroll.setWidget(content)
         parent_layout.addWidget(scroll, stretch=1)
 
     def _setup_manager(self):
         self.manager = AddonManager()
-        self.manager.addons_layout = self.addons_layout
+        self.manager.addon_widgets = self.addon_widgets
         self.manager.update_progress.connect(self._on_progress_update)
         self.manager.operation_finished.connect(self._on_operation_finished)
         self.manager.addon_update_available.connect(self._on_addon_update_available)
+        self.manager.addons_loaded.connect(self._load_addons)
 
         self.error_handler = ErrorHandler()
         self.error_handler.error_occurred.connect(self._show_error_message)
@@ -236,116 +398,44 @@ class AddonUpdater(QMainWindow):
         self.update_timer.timeout.connect(self._check_updates)
         self.update_timer.start(30000)
 
-        self._load_addons()
         self.logger.info("Менеджер настроен")
 
     def _setup_theme(self):
-        dark_palette = QPalette()
-        dark_palette.setColor(QPalette.Window, QColor(45, 45, 45))
-        dark_palette.setColor(QPalette.WindowText, Qt.white)
-        dark_palette.setColor(QPalette.Base, QColor(30, 30, 30))
-        dark_palette.setColor(QPalette.AlternateBase, QColor(45, 45, 45))
-        dark_palette.setColor(QPalette.ToolTipBase, Qt.white)
-        dark_palette.setColor(QPalette.ToolTipText, Qt.white)
-        dark_palette.setColor(QPalette.Text, Qt.white)
-        dark_palette.setColor(QPalette.Button, QColor(60, 60, 60))
-        dark_palette.setColor(QPalette.ButtonText, Qt.white)
-        dark_palette.setColor(QPalette.BrightText, Qt.red)
-        dark_palette.setColor(QPalette.Link, QColor(42, 130, 218))
-        dark_palette.setColor(QPalette.Highlight, QColor(42, 130, 218))
-        dark_palette.setColor(QPalette.HighlightedText, Qt.black)
-        dark_palette.setColor(QPalette.Disabled, QPalette.Text, Qt.darkGray)
-        dark_palette.setColor(QPalette.Disabled, QPalette.ButtonText, Qt.darkGray)
-
-        app = QApplication.instance()
-        app.setPalette(dark_palette)
-
-        self.setStyleSheet("""
-            QWidget {
-                color: #FFFFFF;
-                background-color: #2D2D2D;
-            }
-            QCheckBox {
-                color: #FFFFFF;
-                spacing: 6px;
-                background-color: #2d2d2d;
-                padding: 5px;
-                border-radius: 5px;
-            }
-            QCheckBox::indicator {
-                width: 16px;
-                height: 16px;
-            }
-            QCheckBox::indicator:unchecked {
-                border: 1px solid #555555;
-                background-color: #333333;
-                border-radius: 3px;
-            }
-            QCheckBox::indicator:checked {
-                border: 1px solid #555555;
-                background-color: #2A82DA;
-                border-radius: 3px;
-            }
-            QCheckBox:hover {
-                background-color: #3d3d3d;
-            }
-            QProgressBar {
-                height: 4px;
-                border-radius: 2px;
-                background: #252525;
-            }
-            QProgressBar::chunk {
-                background: #2A82DA;
-                border-radius: 2px;
-            }
-            QLabel {
-                color: #FFFFFF;
-            }
-            QLabel[accessibleName="updateLabel"] {
-                color: #8BC34A;
-                font-style: italic;
-                background-color: transparent;
-                padding: 2px 5px;
-                border-radius: 3px;
-            }
-            QScrollBar:vertical {
-                extreme: none;
-                background: #2D2D2D;
-                width: 10px;
-                margin: 0px 0px 0px 0px;
-            }
-            QScrollBar::handle:vertical {
-                background: #555555;
-                min-height: 20px;
-                border-radius: 4px;
-            }
-        """)
+        QApplication.instance().setPalette(_get_dark_palette())
 
     def _check_game(self):
-        game_exists = Path("Wow.exe").exists()
+        game_exists = path_exists_cached("Wow.exe")
         status_text = "Готова к запуску" if game_exists else "Игра не найдена"
+        if self.game_status.text() == status_text:
+            return
         self.game_status.setText(status_text)
-        self.game_status.setStyleSheet(
-            "color: #4CAF50;" if game_exists else "color: #F44336;"
-        )
+        if self.game_status.property("gameFound") != game_exists:
+            # Цвет задается селектором по свойству, стиль пересчитывается вручную
+            self.game_status.setProperty("gameFound", game_exists)
+            self.game_status.style().unpolish(self.game_status)
+            self.game_status.style().polish(self.game_status)
         self.launch_btn.setEnabled(game_exists)
         self.logger.info(f"Проверка игры: {status_text}")
 
     def _load_addons(self):
-        for name, addon in self.manager.addons.items():
-            self._add_addon_item(name, addon)
+        # Карточки добавляются пачкой: одна раскладка и одна перерисовка в конце
+        self.addon_widget.setUpdatesEnabled(False)
+        self.addons_layout.setEnabled(False)
+        try:
+            # Порядок карточек: NSQC первым, остальные по имени
+            addon_order = sorted(self.manager.addons, key=lambda n: (n != "NSQC", n))
+            for name in addon_order:
+                self._add_addon_item(name, self.manager.addons[name])
+        finally:
+            self.addons_layout.setEnabled(True)
+            self.addons_layout.activate()
+            self.addon_widget.setUpdatesEnabled(True)
         self.logger.info("Аддоны загружены")
 
     def _add_addon_item(self, name: str, addon: AddonData):
         widget = QWidget()
         widget.setObjectName("addonCard")
-        widget.setStyleSheet("""
-            #addonCard {
-                background-color: #2d2d2d;
-                border-radius: 10px;
-                padding: 5px;
-            }
-        """)
+        widget.setAttribute(Qt.WA_StyledBackground, True)
         layout = QVBoxLayout(widget)
         layout.setContentsMargins(10, 10, 10, 10)
         layout.setSpacing(5)
@@ -357,10 +447,9 @@ class AddonUpdater(QMainWindow):
 
         checkbox = QCheckBox(name)
         checkbox.setChecked(addon.installed)
-        checkbox.stateChanged.connect(
-            lambda state, n=name: self.manager.toggle_addon(n, state)
-        )
-        checkbox.setStyleSheet("font-weight: bold; font-size: 12px;")
+        checkbox.setProperty("addon_name", name)
+        checkbox.stateChanged.connect(self._on_checkbox_toggled)
+        checkbox.setObjectName("addonCheckbox")
         top_layout.addWidget(checkbox)
 
         update_label = QLabel()
@@ -373,24 +462,11 @@ class AddonUpdater(QMainWindow):
         top_layout.addStretch()
 
         desc = QLabel(addon.description)
-        desc.setStyleSheet("color: #AAAAAA; font-size: 11px;")
+        desc.setObjectName("addonDesc")
         desc.setWordWrap(True)
 
-        progress = QProgressBar()
-        progress.setRange(0, 100)
-        progress.setTextVisible(False)
+        progress = AddonProgressBar()
         progress.setVisible(False)
-        progress.setStyleSheet("""
-            QProgressBar {
-                height: 3px;
-                border-radius: 1px;
-                background: #252525;
-            }
-            QProgressBar::chunk {
-                background: #2A82DA;
-                border-radius: 1px;
-            }
-        """)
 
         layout.addWidget(top_row)
         layout.addWidget(desc)
@@ -402,38 +478,51 @@ class AddonUpdater(QMainWindow):
         widget.name = name
 
         self.addons_layout.addWidget(widget)
+        self.addon_widgets[name] = widget
+
+    def _on_checkbox_toggled(self, state: int):
+        name = self.sender().property("addon_name")
+        self.manager.toggle_addon(name, state)
 
     def _on_progress_update(self, name: str, progress: float):
-        for i in range(self.addons_layout.count()):
-            w = self.addons_layout.itemAt(i).widget()
-            if w and hasattr(w, "name") and w.name == name:
-                w.progress.setValue(int(progress * 100))
+        self._pending_progress[name] = progress
+        if not self._flush_timer.isActive():
+            self._flush_timer.start(33)
+
+    def _flush_progress(self):
+        pending, self._pending_progress = self._pending_progress, {}
+        for name, progress in pending.items():
+            w = self.addon_widgets.get(name)
+            if w is None:
+                continue
+
+            w.progress.setValue(int(progress * 100))
+            if w.progress.isHidden():
                 w.progress.setVisible(True)
-                break
 
     def _on_operation_finished(self, name: str, success: bool):
-        for i in range(self.addons_layout.count()):
-            w = self.addons_layout.itemAt(i).widget()
-            if w and hasattr(w, "name") and w.name == name:
-                try:
-                    addon = self.manager.addons[name]
-                    w.progress.setVisible(False)
-
-                    w.checkbox.blockSignals(True)
-                    w.checkbox.setChecked(addon.installed)
-                    w.checkbox.blockSignals(False)
+        # Отложенный прогресс не должен снова показать скрытую полосу
+        self._pending_progress.pop(name, None)
+        w = self.addon_widgets.get(name)
+        if w is None:
+            return
 
-                    if name == "NSQC":
-                        w.update_label.setVisible(addon.needs_update)
-                        w.update_label.setText(
-                            "Доступно обновление" if addon.needs_update else ""
-                        )
+        try:
+            addon = self.manager.addons[name]
+            w.progress.setVisible(False)
 
-                    w.checkbox.update()
-                    w.checkbox.repaint()
-                except Exception as e:
-                    self.logger.error(f"Ошибка обновления UI: {str(e)}")
-                break
+            if w.checkbox.isChecked() != addon.installed:
+                with QSignalBlocker(w.checkbox):
+                    w.checkbox.setChecked(addon.installed)
+
+            if name == "NSQC":
+                text = "Доступно обновление" if addon.needs_update else ""
+                if w.update_label.isHidden() == addon.needs_update:
+                    w.update_label.setVisible(addon.needs_update)
+                if w.update_label.text() != text:
+                    w.update_label.setText(text)
+        except Exception as e:
+            self.logger.error(f"Ошибка обновления UI: {str(e)}")
 
     def _on_addon_update_available(self, name: str):
         if name == "NSQC":
@@ -449,8 +538,15 @@ class AddonUpdater(QMainWindow):
         self.logger.error(f"Показано сообщение об ошибке: {message}")
 
     def _check_updates(self):
+        # Свернутое окно или открытый голосовой чат: результат показывать некому
+        if (
+            not self.isVisible()
+            or self.isMinimized()
+            or self.stacked_widget.currentWidget() is not self.addon_widget
+        ):
+            return
         if "NSQC" in self.manager.addons:
-            self.manager.check_nsqc_update()
+            self.manager.poll_nsqc_update()
 
     def _launch_game(self):
         self.logger.info("Запуск игры...")
@@ -460,15 +556,43 @@ class AddonUpdater(QMainWindow):
 
     def show_voice_chat(self):
         self.logger.info("Переход к голосовому чату")
+        if self.voice_widget is None:
+            # Импорт здесь: модуль тянет за собой аудио-бэкенд
+            from voice_client_ui import VoiceChatUI
+
+            self.voice_widget = VoiceChatUI(self)
+            self.stacked_widget.addWidget(self.voice_widget)
         self.stacked_widget.setCurrentWidget(self.voice_widget)
-        self.voice_widget.start_voice_client()
 
     def show_addon_manager(self):
         self.logger.info("Переход к менеджеру аддонов")
-        self.voice_widget.stop_voice_client()
         self.stacked_widget.setCurrentWidget(self.addon_widget)
 
+    def _on_page_changed(self, index: int):
+        # Голосовой клиент работает, только пока его страница на экране
+        if self.voice_widget is None:
+            return
+        if self.stacked_widget.widget(index) is self.voice_widget:
+            self.voice_widget.start_voice_client()
+        else:
+            self.voice_widget.stop_voice_client()
+
+    def changeEvent(self, event):
+        # Проверка игры при возврате в окно: ответ берется из кэша,
+        # пока каталог не менялся
+        if event.type() == QEvent.ActivationChange and self.isActiveWindow():
+            self._check_game()
+        super().changeEvent(event)
+
     def closeEvent(self, event):
+        global _log_listener
         self.logger.info("Закрытие приложения")
-        self.voice_widget.stop_voice_client()
+        if self.voice_widget is not None:
+            self.voice_widget.stop_voice_client()
+        if _log_listener is not None:
+            # Дописывает очередь в файл и останавливает поток
+            _log_listener.stop()
+            for handler in _log_listener.handlers:
+                handler.close()
+            _log_listener = None
         event.accept()
@@ -2,17 +2,57 @@ import os
 import logging
 import urllib.request
 import json
+import gzip
 import platform
 import subprocess
 import zipfile
 import shutil
 import tempfile
-import traceback
+import threading
+import time
+import http.client
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
-from urllib.request import Request, urlopen
-from urllib.error import URLError
+from typing import Optional
+from urllib.parse import urljoin, urlsplit
+from urllib.request import Request, urlopen, getproxies
+from urllib.error import URLError, HTTPError
 from PyQt5.QtCore import QObject, pyqtSignal
 
+# orjson необязателен, без него используется стандартный json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_SYSTEM = platform.system()
+
+USER_AGENT = "NightWatchUpdater"
+ADDONS_CONFIG_URL = "https://raw.githubusercontent.com/Vladgobelen/NSQCu/main/addons.json"
+NSQC_VERSION_URL = "https://raw.githubusercontent.com/Vladgobelen/NSQC/main/vers"
+
+# Кэш удаленных файлов (ETag / Last-Modified + тело ответа)
+REMOTE_CACHE_PATH = Path(".cache/remote_meta.json")
+# В течение этого времени повторный запрос не отправляется вовсе
+REMOTE_CACHE_TTL = 5.0
+
+_remote_cache = None
+_remote_checked = {}
+_remote_lock = threading.Lock()
+
+NSQC_LOCAL_VERSION_PATH = Path("Interface/AddOns/NSQC/vers")
+# ((st_mtime_ns, st_size), версия) последнего прочитанного файла vers
+_local_version_cache = (None, None)
+
+HTTP_TIMEOUT = 30
+HTTP_MAX_REDIRECTS = 5
+
+# Простаивающие keep-alive соединения по (схема, хост), общие для всех потоков
+_idle_connections = {}
+_connections_lock = threading.Lock()
+_proxies = getproxies()
+
 
 def setup_logging():
     log_file = Path("NSQCuP.log")
@@ -20,7 +60,7 @@ def setup_logging():
         level=logging.ERROR,
         format="%(asctime)s - %(levelname)s - %(message)s",
         handlers=[
-            logging.FileHandler(log_file, encoding="utf-8"),
+            logging.FileHandler(log_file, encoding="utf-8", delay=True),
         ],
     )
 
@@ -35,33 +75,220 @@ def configure_environment():
     os.environ["QT_QPA_PLATFORM"] = "windows"
 
 
-def load_addons_config():
+def _load_remote_cache() -> dict:
+    global _remote_cache
+    if _remote_cache is None:
+        try:
+            with open(REMOTE_CACHE_PATH, "r", encoding="utf-8") as f:
+                _remote_cache = json.load(f)
+        except Exception:
+            _remote_cache = {}
+    return _remote_cache
+
+
+def _save_remote_cache():
     try:
-        url = "https://raw.githubusercontent.com/Vladgobelen/NSQCu/main/addons.json"
-        req = Request(url, headers={"User-Agent": "NightWatchUpdater"})
+        REMOTE_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        # Запись через временный файл: прерванное сохранение не портит кэш
+        temp_path = REMOTE_CACHE_PATH.with_suffix(".tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(_remote_cache, f, ensure_ascii=False)
+        os.replace(temp_path, REMOTE_CACHE_PATH)
+    except Exception as e:
+        logging.error(f"Не удалось сохранить кэш удаленных файлов: {e}")
+
+
+def _acquire_connection(scheme: str, host: str):
+    with _connections_lock:
+        idle = _idle_connections.get((scheme, host))
+        if idle:
+            return idle.pop()
+    if scheme == "https":
+        return http.client.HTTPSConnection(host, timeout=HTTP_TIMEOUT)
+    return http.client.HTTPConnection(host, timeout=HTTP_TIMEOUT)
+
+
+def _release_connection(scheme: str, host: str, conn, response):
+    # Недочитанный ответ не дает переиспользовать соединение
+    if not response.isclosed() or response.will_close:
+        conn.close()
+        return
+    with _connections_lock:
+        _idle_connections.setdefault((scheme, host), []).append(conn)
+
+
+def _send_request(conn, path: str, headers: dict):
+    try:
+        conn.request("GET", path, headers=headers)
+        return conn.getresponse()
+    except (http.client.HTTPException, ConnectionError):
+        # Сервер мог закрыть простаивающее соединение, пробуем заново
+        conn.close()
+        conn.request("GET", path, headers=headers)
+        return conn.getresponse()
+
+
+@contextmanager
+def http_get(url: str, headers: dict = None):
+    """GET-запрос с переиспользованием соединений; тело читается внутри with"""
+    request_headers = {"User-Agent": USER_AGENT}
+    if headers:
+        request_headers.update(headers)
+
+    if _proxies.get(urlsplit(url).scheme):
+        with urlopen(Request(url, headers=request_headers)) as response:
+            yield response
+        return
+
+    for _ in range(HTTP_MAX_REDIRECTS + 1):
+        parts = urlsplit(url)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+
+        conn = _acquire_connection(parts.scheme, parts.netloc)
+        try:
+            response = _send_request(conn, path, request_headers)
+        except Exception:
+            conn.close()
+            raise
+
+        location = response.getheader("Location")
+        if response.status in (301, 302, 303, 307, 308) and location:
+            response.read()
+            _release_connection(parts.scheme, parts.netloc, conn, response)
+            url = urljoin(url, location)
+            continue
+
+        try:
+            if response.status >= 300:
+                response.read()
+                raise HTTPError(url, response.status, response.reason, response.headers, None)
+            yield response
+        finally:
+            _release_connection(parts.scheme, parts.netloc, conn, response)
+        return
+
+    raise HTTPError(url, 310, "Слишком много перенаправлений", None, None)
 
-        with urlopen(req) as response:
-            return json.loads(response.read().decode("utf-8"))
+
+def fetch_remote_text(url: str) -> str:
+    """Загружает текстовый файл с условным GET (If-None-Match / If-Modified-Since)"""
+    with _remote_lock:
+        entry = _load_remote_cache().get(url)
+        checked = _remote_checked.get(url)
+        if (
+            entry is not None
+            and checked is not None
+            and time.monotonic() - checked < REMOTE_CACHE_TTL
+        ):
+            return entry["body"]
+
+    headers = {"Accept-Encoding": "gzip"}
+    if entry is not None:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    try:
+        with http_get(url, headers) as response:
+            data = response.read()
+            if response.headers.get("Content-Encoding") == "gzip":
+                data = gzip.decompress(data)
+            body = data.decode("utf-8")
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+    except HTTPError as e:
+        if e.code != 304 or entry is None:
+            raise
+        with _remote_lock:
+            _remote_checked[url] = time.monotonic()
+        return entry["body"]
+
+    with _remote_lock:
+        _load_remote_cache()[url] = {
+            "etag": etag,
+            "last_modified": last_modified,
+            "body": body,
+        }
+        _remote_checked[url] = time.monotonic()
+        _save_remote_cache()
+    return body
+
+
+def read_local_nsqc_version() -> Optional[str]:
+    """Версия установленного NSQC; файл перечитывается только при изменении"""
+    global _local_version_cache
+    try:
+        st = os.stat(NSQC_LOCAL_VERSION_PATH)
+    except OSError:
+        return None
+
+    key = (st.st_mtime_ns, st.st_size)
+    cached_key, cached_version = _local_version_cache
+    if key == cached_key:
+        return cached_version
+
+    try:
+        with open(NSQC_LOCAL_VERSION_PATH, "r") as f:
+            version = f.read().strip()
+    except Exception as e:
+        logging.error(f"Ошибка чтения локальной версии NSQC: {e}")
+        return None
+
+    _local_version_cache = (key, version)
+    return version
+
+
+def loads_json(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def load_addons_config():
+    try:
+        return loads_json(fetch_remote_text(ADDONS_CONFIG_URL))
 
     except Exception as e:
-        logging.error(f"Ошибка загрузки конфига аддонов: {str(e)}\n{traceback.format_exc()}")
+        logging.error("Ошибка загрузки конфига аддонов: %s", e, exc_info=True)
         return {"addons": {}}
 
 
+@lru_cache(maxsize=16)
+def _path_exists_at(path: str, dir_mtime_ns: int) -> bool:
+    return os.path.exists(path)
+
+
+def path_exists_cached(path) -> bool:
+    """os.path.exists, перепроверяется только при изменении mtime каталога"""
+    path = str(path)
+    try:
+        dir_mtime_ns = os.stat(os.path.dirname(path) or ".").st_mtime_ns
+    except OSError:
+        return os.path.exists(path)
+    return _path_exists_at(path, dir_mtime_ns)
+
+
 def launch_game():
     wow_path = Path("Wow.exe")
-    if not wow_path.exists():
+    if not path_exists_cached(wow_path):
         logging.error("Файл Wow.exe не найден")
         return False
 
     try:
-        if platform.system() == "Windows":
+        if _SYSTEM == "Windows":
+            os.startfile(str(wow_path))
+        else:
             subprocess.Popen(
-                [str(wow_path)], creationflags=subprocess.CREATE_NO_WINDOW
+                [str(wow_path)],
+                start_new_session=True,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
             )
-        else:
-            subprocess.Popen([str(wow_path)])
         return True
     except Exception as e:
-        logging.error(f"Ошибка запуска игры: {str(e)}\n{traceback.format_exc()}")
+        logging.error("Ошибка запуска игры: %s", e, exc_info=True)
         return False